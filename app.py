@@ -12,13 +12,21 @@ from utils.detector import detect_pdf_type, get_pdf_type_description, get_extrac
 from utils.converters import (
     dataframe_to_csv, 
     dataframe_to_excel, 
+    dataframe_to_parquet,
+    dataframe_to_feather,
     clean_dataframe,
     get_file_extension,
     get_mime_type
 )
-from extractors.text_table import extract_text_tables, combine_tables
+from extractors.text_table import extract_text_tables, combine_tables, table_to_dataframe
 from extractors.scanned import extract_scanned_pdf
 from extractors.report import extract_report
+from utils.cache import cached_extraction
+from utils.pool import get_process_pool
+
+
+# Max rows sent to the browser for the preview table; full data is in the downloads
+PREVIEW_ROWS = 5000
 
 
 # Page configuration
@@ -52,9 +60,109 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
+# Cached wrappers - Streamlit re-runs the whole script on every widget interaction,
+# so key the expensive detection/extraction work on the uploaded file's bytes.
+# Extraction results are also persisted to disk so they survive app restarts.
+@st.cache_data(show_spinner=False, max_entries=8)
+def _cached_detect(file_bytes: bytes):
+    return detect_pdf_type(BytesIO(file_bytes))
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _cached_extract_text_tables(file_bytes: bytes, method: str):
+    return cached_extraction(
+        file_bytes, ('text_tables', method),
+        lambda: extract_text_tables(file_bytes, method=method, raw=True)
+    )
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _cached_extract_scanned(file_bytes: bytes, output_format: str, dpi: int):
+    return cached_extraction(
+        file_bytes, ('scanned', output_format, dpi),
+        lambda: extract_scanned_pdf(file_bytes, output_format=output_format, dpi=dpi)
+    )
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _cached_extract_report(file_bytes: bytes, output_type: str):
+    return cached_extraction(
+        file_bytes, ('report', output_type),
+        lambda: extract_report(file_bytes, output_type=output_type)
+    )
+
+
+def _extract_text_tables(file_bytes: bytes, options: dict):
+    tables, metadata = _cached_extract_text_tables(
+        file_bytes,
+        method=options.get('method', 'pdfplumber')
+    )
+    
+    if tables and options.get('combine', True):
+        df = combine_tables(tables)
+    elif tables:
+        df = table_to_dataframe(tables[0])  # Use first table
+    else:
+        df = pd.DataFrame({'Message': ['No tables found']})
+    
+    return df, metadata
+
+
+def _extract_scanned(file_bytes: bytes, options: dict):
+    return _cached_extract_scanned(
+        file_bytes,
+        output_format=options.get('output_format', 'auto'),
+        dpi=options.get('dpi', 200)
+    )
+
+
+def _extract_report(file_bytes: bytes, options: dict):
+    return _cached_extract_report(
+        file_bytes,
+        output_type=options.get('output_type', 'combined')
+    )
+
+
+# Extraction entry point for each PDF type
+_EXTRACTORS = {
+    'text_tables': _extract_text_tables,
+    'scanned': _extract_scanned,
+    'report': _extract_report
+}
+
+
+def _dataframe_key(df: pd.DataFrame) -> tuple:
+    """Content hash of a DataFrame, used as the cache key for its downloads"""
+    return tuple(df.columns), len(df), int(pd.util.hash_pandas_object(df, index=False).sum())
+
+
+# The DataFrame itself is passed as _df so Streamlit skips hashing it - df_key identifies it
+@st.cache_data(show_spinner=False, max_entries=8)
+def _csv_bytes(df_key: tuple, _df: pd.DataFrame) -> bytes:
+    return dataframe_to_csv(_df)
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _excel_bytes(df_key: tuple, _df: pd.DataFrame) -> bytes:
+    return dataframe_to_excel(_df)
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _parquet_bytes(df_key: tuple, _df: pd.DataFrame) -> bytes:
+    return dataframe_to_parquet(_df)
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _feather_bytes(df_key: tuple, _df: pd.DataFrame) -> bytes:
+    return dataframe_to_feather(_df)
+
+
 def main():
     """Main application function"""
     
+    # Start the shared extraction workers up front (once per server process)
+    get_process_pool()
+    
     # Header
     st.markdown('<p class="main-header">📄 PDF Data Extractor</p>', unsafe_allow_html=True)
     st.markdown('<p class="sub-header">Intelligently extract data from any PDF - tables, text, or scanned documents</p>', unsafe_allow_html=True)
@@ -100,6 +208,8 @@ def main():
     )
     
     if uploaded_file is not None:
+        file_bytes = uploaded_file.getvalue()
+        
         # Display file info
         col1, col2, col3 = st.columns(3)
         with col1:
@@ -115,7 +225,7 @@ def main():
         st.header("2️⃣ PDF Type Detection")
         
         with st.spinner("🔍 Analyzing PDF..."):
-            detected_type, detection_metadata = detect_pdf_type(uploaded_file)
+            detected_type, detection_metadata = _cached_detect(file_bytes)
             st.session_state.pdf_type = detected_type
         
         # Show detection results
@@ -179,6 +289,12 @@ def main():
                     help="Auto tries to detect structure, text returns simple text"
                 )
             with col2:
+                extraction_options['dpi'] = st.select_slider(
+                    "OCR Resolution (DPI)",
+                    options=[150, 200, 300],
+                    value=200,
+                    help="Higher DPI can help with small print but makes OCR slower"
+                )
                 st.info("⚠️ OCR may take longer for large files")
         
         elif final_pdf_type == 'report':
@@ -193,30 +309,7 @@ def main():
             with st.spinner(f"Extracting data using {final_pdf_type} method..."):
                 try:
                     # Perform extraction based on PDF type
-                    if final_pdf_type == 'text_tables':
-                        tables, metadata = extract_text_tables(
-                            uploaded_file, 
-                            method=extraction_options.get('method', 'pdfplumber')
-                        )
-                        
-                        if tables and extraction_options.get('combine', True):
-                            df = combine_tables(tables)
-                        elif tables:
-                            df = tables[0]  # Use first table
-                        else:
-                            df = pd.DataFrame({'Message': ['No tables found']})
-                        
-                    elif final_pdf_type == 'scanned':
-                        df, metadata = extract_scanned_pdf(
-                            uploaded_file,
-                            output_format=extraction_options.get('output_format', 'auto')
-                        )
-                        
-                    else:  # report
-                        df, metadata = extract_report(
-                            uploaded_file,
-                            output_type=extraction_options.get('output_type', 'combined')
-                        )
+                    df, metadata = _EXTRACTORS[final_pdf_type](file_bytes, extraction_options)
                     
                     # Clean the data
                     df = clean_dataframe(df)
@@ -254,16 +347,32 @@ def main():
             with col3:
                 st.metric("Method", metadata.get('method', 'N/A'))
             
-            st.dataframe(df, use_container_width=True, height=400)
+            # Only ship a window of large results to the browser
+            if len(df) > PREVIEW_ROWS:
+                preview_start = st.slider(
+                    "Preview rows starting at",
+                    min_value=0,
+                    max_value=(len(df) - 1) // PREVIEW_ROWS * PREVIEW_ROWS,
+                    step=PREVIEW_ROWS
+                )
+            else:
+                preview_start = 0
+            preview_end = min(preview_start + PREVIEW_ROWS, len(df))
+            
+            st.dataframe(df.iloc[preview_start:preview_end], use_container_width=True, height=400)
+            if len(df) > PREVIEW_ROWS:
+                st.caption(f"Showing {preview_start}–{preview_end} of {len(df)} rows - download for the full data")
             
             # Download section
             st.subheader("💾 Download Options")
             
-            col1, col2 = st.columns(2)
+            df_key = _dataframe_key(df)
+            
+            col1, col2, col3, col4 = st.columns(4)
             
             with col1:
                 # CSV download
-                csv_data = dataframe_to_csv(df)
+                csv_data = _csv_bytes(df_key, df)
                 st.download_button(
                     label="📥 Download as CSV",
                     data=csv_data,
@@ -274,7 +383,7 @@ def main():
             
             with col2:
                 # Excel download
-                excel_data = dataframe_to_excel(df)
+                excel_data = _excel_bytes(df_key, df)
                 st.download_button(
                     label="📥 Download as Excel",
                     data=excel_data,
@@ -283,6 +392,28 @@ def main():
                     use_container_width=True
                 )
             
+            with col3:
+                # Parquet download (compressed and columnar - much smaller than CSV)
+                parquet_data = _parquet_bytes(df_key, df)
+                st.download_button(
+                    label="📥 Download as Parquet",
+                    data=parquet_data,
+                    file_name=f"{uploaded_file.name.replace('.pdf', '')}_extracted{get_file_extension('parquet')}",
+                    mime=get_mime_type('parquet'),
+                    use_container_width=True
+                )
+            
+            with col4:
+                # Feather download
+                feather_data = _feather_bytes(df_key, df)
+                st.download_button(
+                    label="📥 Download as Feather",
+                    data=feather_data,
+                    file_name=f"{uploaded_file.name.replace('.pdf', '')}_extracted{get_file_extension('feather')}",
+                    mime=get_mime_type('feather'),
+                    use_container_width=True
+                )
+            
             # Additional info
             if metadata.get('errors'):
                 with st.expander("⚠️ Warnings/Errors During Extraction"):
@@ -0,0 +1,85 @@
+"""
+Shared Page-level Helpers
+Per-page pdfplumber extraction and temporary-file plumbing used by the extractors
+"""
+
+import pdfplumber
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+import tempfile
+import os
+
+
+# Bordered ("wired") table detection: table cells come from the page's ruling lines
+TABLE_SETTINGS = {
+    'vertical_strategy': 'lines',
+    'horizontal_strategy': 'lines',
+    'snap_tolerance': 3
+}
+
+
+@contextmanager
+def temporary_pdf(pdf_bytes: bytes) -> Iterator[str]:
+    """
+    Write PDF bytes to a temporary file and yield its path
+
+    pdfplumber and tabula can then read straight from disk, and worker processes
+    only need the path rather than a copy of the bytes. The file is removed on exit.
+
+    Args:
+        pdf_bytes: Raw PDF bytes (or a memoryview over them)
+
+    Yields:
+        Path to the temporary .pdf file
+    """
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
+        tmp_path = tmp_file.name
+        tmp_file.write(pdf_bytes)
+
+    try:
+        yield tmp_path
+    finally:
+        # Clean up temp file
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def count_pages(pdf_path: str) -> int:
+    """Return the number of pages in the PDF"""
+    with pdfplumber.open(pdf_path) as pdf:
+        return len(pdf.pages)
+
+
+def extract_page(pdf_path: str, page_num: int, want_tables: bool,
+                 want_text: bool) -> Tuple[int, Optional[str], List[list], Optional[str]]:
+    """
+    Extract raw text and/or tables from a single page (runs inside a worker process)
+
+    Args:
+        pdf_path: Path to the PDF file
+        page_num: 1-based page number
+        want_tables: Whether to run table extraction
+        want_text: Whether to run text extraction
+
+    Returns:
+        Tuple of (page number, text or None, raw tables as lists of rows, error message or None)
+    """
+    text = None
+    tables = []
+
+    try:
+        with pdfplumber.open(pdf_path, pages=[page_num]) as pdf:
+            page = pdf.pages[0]
+
+            if want_text:
+                text = page.extract_text()
+
+            # With line-based strategies a page without any ruling lines, rects or
+            # curves cannot contain a table, so skip the layout pass entirely
+            if want_tables and (page.lines or page.rects or page.curves):
+                tables = page.extract_tables(table_settings=TABLE_SETTINGS) or []
+
+        return page_num, text, tables, None
+
+    except Exception as e:
+        return page_num, text, tables, str(e)
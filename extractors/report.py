@@ -3,88 +3,194 @@ Report/Document Extractor
 Extracts text and any tables from report-style PDFs using pdfplumber
 """
 
-import pdfplumber
+import numpy as np
 import pandas as pd
-from typing import List, Tuple, Dict
+from collections import Counter
+from itertools import repeat
+from typing import Dict, Iterator, List, Set, Tuple
+import re
 
+from extractors.common import count_pages, extract_page, temporary_pdf
+from utils.pool import map_pages
+from utils.converters import concat_dataframes
 
-def extract_report_content(pdf_file) -> Tuple[Dict[str, any], dict]:
+
+# Header/footer detection: candidate lines are the first/last few non-empty lines of
+# each page; short ones recurring on at least half the pages are stripped
+_EDGE_LINES = 3
+_MAX_HEADER_LENGTH = 100
+_MIN_REPEAT_RATIO = 0.5
+_MIN_PAGES_FOR_HEADERS = 3
+
+# "3", "Page 3", "Page 3 of 9", "3/9", "- 3 -"
+_PAGE_NUMBER_RE = re.compile(r'^(page\s*)?\d+(\s*(of|/)\s*\d+)?$|^-\s*\d+\s*-$', re.IGNORECASE)
+
+
+def _normalize_line(line: str) -> str:
+    """Normalize a line for header/footer matching - page numbers all match each other"""
+    line = line.strip()
+    return '<page number>' if _PAGE_NUMBER_RE.match(line) else line
+
+
+def _edge_line_indices(lines: List[str]) -> List[int]:
+    """Indices of the first and last few non-empty lines"""
+    content_idx = [i for i, line in enumerate(lines) if line.strip()]
+    return content_idx[:_EDGE_LINES] + content_idx[-_EDGE_LINES:]
+
+
+def _find_repeated_lines(page_texts: List[str]) -> Set[str]:
     """
-    Extract all content (text + tables) from a report-style PDF
+    Find header/footer lines repeated across pages
     
     Args:
-        pdf_file: Uploaded PDF file object
+        page_texts: Text of each page that has text
         
     Returns:
-        Tuple of (content dict, metadata dict)
+        Set of normalized lines to strip
     """
     
-    content = {
-        'full_text': [],
-        'tables': [],
-        'page_contents': []
-    }
+    if len(page_texts) < _MIN_PAGES_FOR_HEADERS:
+        return set()
+    
+    counts = Counter()
+    for text in page_texts:
+        lines = text.split('\n')
+        counts.update({
+            _normalize_line(lines[i]) for i in _edge_line_indices(lines)
+            if len(lines[i].strip()) <= _MAX_HEADER_LENGTH
+        })
     
-    metadata = {
+    min_count = _MIN_REPEAT_RATIO * len(page_texts)
+    return {line for line, count in counts.items() if count >= min_count}
+
+
+def _strip_repeated_lines(text: str, repeated: Set[str]) -> str:
+    """Remove repeated header/footer lines from the edges of a page's text"""
+    lines = text.split('\n')
+    to_strip = {i for i in _edge_line_indices(lines) if _normalize_line(lines[i]) in repeated}
+    return '\n'.join(line for i, line in enumerate(lines) if i not in to_strip)
+
+
+def _new_metadata() -> dict:
+    """Return an empty metadata dict for report extraction"""
+    return {
         'method': 'pdfplumber comprehensive',
         'total_pages': 0,
         'total_tables': 0,
         'total_text_length': 0,
         'errors': []
     }
+
+
+def iter_report_pages(pdf_bytes: bytes, metadata: dict) -> Iterator[Tuple[int, str, List[pd.DataFrame]]]:
+    """
+    Lazily extract a report-style PDF page by page
+    
+    Args:
+        pdf_bytes: Raw PDF bytes
+        metadata: Metadata dict (from _new_metadata) filled in as pages are consumed
+        
+    Yields:
+        Tuples of (page number, page text or '', list of DataFrames)
+    """
     
     try:
-        pdf_file.seek(0)
+        with temporary_pdf(pdf_bytes) as pdf_path:
+            num_pages = count_pages(pdf_path)
+            metadata['total_pages'] = num_pages
+            
+            # Extract text and tables from each page in parallel; results come back in page order
+            results = map_pages(
+                extract_page,
+                repeat(pdf_path),
+                range(1, num_pages + 1),
+                repeat(True),
+                repeat(True),
+                num_tasks=num_pages
+            )
         
-        with pdfplumber.open(pdf_file) as pdf:
-            metadata['total_pages'] = len(pdf.pages)
+        # Running headers/footers repeat on every page; find them once up front
+        repeated = _find_repeated_lines([text for _, text, _, _ in results if text])
+        
+        text_pages = 0
+        text_length = 0
+        
+        for page_num, text, tables, error in results:
+            page_tables = []
             
-            for page_num, page in enumerate(pdf.pages, 1):
-                page_content = {
-                    'page_number': page_num,
-                    'text': '',
-                    'tables': []
-                }
+            if text and repeated:
+                text = _strip_repeated_lines(text, repeated)
+            
+            try:
+                for table_idx, table in enumerate(tables):
+                    if table and len(table) > 0:
+                        # Convert to DataFrame
+                        df = pd.DataFrame(table[1:], columns=table[0])
+                        df.attrs['page'] = page_num
+                        df.attrs['table_index'] = table_idx + 1
+                        
+                        page_tables.append(df)
                 
-                try:
-                    # Extract text
-                    text = page.extract_text()
-                    if text:
-                        page_content['text'] = text
-                        content['full_text'].append(f"--- Page {page_num} ---\n{text}\n")
+                if error is not None:
+                    metadata['errors'].append(f"Page {page_num}: {error}")
                     
-                    # Extract tables
-                    tables = page.extract_tables()
-                    if tables:
-                        for table_idx, table in enumerate(tables):
-                            if table and len(table) > 0:
-                                # Convert to DataFrame
-                                df = pd.DataFrame(table[1:], columns=table[0])
-                                df.attrs['page'] = page_num
-                                df.attrs['table_index'] = table_idx + 1
-                                
-                                page_content['tables'].append(df)
-                                content['tables'].append(df)
-                                
-                except Exception as e:
-                    metadata['errors'].append(f"Page {page_num}: {str(e)}")
-                
-                content['page_contents'].append(page_content)
+            except Exception as e:
+                metadata['errors'].append(f"Page {page_num}: {str(e)}")
+            
+            # Length of the "--- Page N ---" block this page contributes to the full text
+            if text:
+                text_pages += 1
+                text_length += len(f"--- Page {page_num} ---\n{text}\n")
             
-            # Compile metadata
-            metadata['total_tables'] = len(content['tables'])
-            full_text_combined = "\n".join(content['full_text'])
-            metadata['total_text_length'] = len(full_text_combined)
+            metadata['total_tables'] += len(page_tables)
+            
+            yield page_num, text or '', page_tables
         
-        pdf_file.seek(0)
+        # Account for the newlines joining the page blocks
+        metadata['total_text_length'] = text_length + max(text_pages - 1, 0)
         
     except Exception as e:
         metadata['errors'].append(f"General error: {str(e)}")
-        pdf_file.seek(0)
+
+
+def extract_report_content(pdf_bytes: bytes) -> Tuple[Dict[str, any], dict]:
+    """
+    Extract all content (text + tables) from a report-style PDF
+    
+    Args:
+        pdf_bytes: Raw PDF bytes
+        
+    Returns:
+        Tuple of (content dict, metadata dict)
+    """
+    
+    content = {
+        'full_text': [],
+        'tables': [],
+        'page_contents': []
+    }
+    
+    metadata = _new_metadata()
+    
+    for page_num, text, tables in iter_report_pages(pdf_bytes, metadata):
+        if text:
+            content['full_text'].append(f"--- Page {page_num} ---\n{text}\n")
+        content['tables'].extend(tables)
+        content['page_contents'].append({
+            'page_number': page_num,
+            'text': text,
+            'tables': tables
+        })
     
     return content, metadata
 
 
+def _shares_schema(tables: List[pd.DataFrame]) -> bool:
+    """Whether all tables have identical columns and a source page in attrs"""
+    columns = tuple(tables[0].columns)
+    return all(tuple(table.columns) == columns and 'page' in table.attrs for table in tables)
+
+
 def content_to_dataframe(content: Dict[str, any], include_text: bool = True) -> pd.DataFrame:
     """
     Convert extracted content to a single DataFrame
@@ -98,11 +204,19 @@ def content_to_dataframe(content: Dict[str, any], include_text: bool = True) ->
     """
     
     rows = []
+    tables = content['tables']
     
     # If there are tables, prioritize those
-    if content['tables']:
+    if tables and _shares_schema(tables):
+        # Same columns everywhere (the common case): stack the raw values as one
+        # numpy block instead of copying and aligning each table in a concat
+        df = pd.DataFrame(np.vstack([table.to_numpy() for table in tables]), columns=tables[0].columns)
+        df.insert(0, 'Source_Page', np.repeat([table.attrs['page'] for table in tables],
+                                              [len(table) for table in tables]))
+    
+    elif tables:
         # Combine all tables
-        for table in content['tables']:
+        for table in tables:
             # Add page info as a column if available
             if hasattr(table, 'attrs') and 'page' in table.attrs:
                 table_with_page = table.copy()
@@ -114,7 +228,7 @@ def content_to_dataframe(content: Dict[str, any], include_text: bool = True) ->
         # Concatenate all tables
         if rows:
             try:
-                df = pd.concat(rows, ignore_index=True)
+                df = concat_dataframes(rows)
             except Exception:
                 # If tables have different structures, keep them separate
                 df = pd.DataFrame({
@@ -146,33 +260,43 @@ def content_to_dataframe(content: Dict[str, any], include_text: bool = True) ->
     return df
 
 
-def extract_report(pdf_file, output_type: str = 'combined') -> Tuple[pd.DataFrame, dict]:
+def extract_report(pdf_bytes: bytes, output_type: str = 'combined') -> Tuple[pd.DataFrame, dict]:
     """
     Main extraction function for report-style PDFs
     
     Args:
-        pdf_file: Uploaded PDF file object
+        pdf_bytes: Raw PDF bytes
         output_type: 'combined' (all in one), 'tables_only', or 'text_only'
         
     Returns:
         Tuple of (DataFrame, metadata dict)
     """
     
+    # Text only is streamed page by page, never building the combined text
+    if output_type == 'text_only':
+        metadata = _new_metadata()
+        metadata['output_type'] = output_type
+        
+        lines = []
+        for page_num, text, _ in iter_report_pages(pdf_bytes, metadata):
+            if text:
+                lines.append(f"--- Page {page_num} ---")
+                lines.extend(line for line in text.splitlines() if line.strip())
+        
+        if lines:
+            df = pd.DataFrame({'Text': lines})
+        else:
+            df = pd.DataFrame({'Message': ['No text extracted']})
+        
+        return df, metadata
+    
     # Extract all content
-    content, metadata = extract_report_content(pdf_file)
+    content, metadata = extract_report_content(pdf_bytes)
     metadata['output_type'] = output_type
     
     # Convert to DataFrame based on output type
     if output_type == 'tables_only':
         df = content_to_dataframe(content, include_text=False)
-    elif output_type == 'text_only':
-        # Text only
-        if content['full_text']:
-            text_combined = "\n".join(content['full_text'])
-            lines = [line for line in text_combined.split('\n') if line.strip()]
-            df = pd.DataFrame({'Text': lines if lines else ['No text extracted']})
-        else:
-            df = pd.DataFrame({'Message': ['No text extracted']})
     else:  # combined
         df = content_to_dataframe(content, include_text=True)
     
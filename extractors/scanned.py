@@ -1,22 +1,86 @@
 """
 Scanned/Image-based PDF Extractor
-Uses OCR (pytesseract) to extract text from scanned PDFs
+Uses OCR (tesserocr) to extract text from scanned PDFs
 """
 
 import pandas as pd
-from pdf2image import convert_from_bytes
-import pytesseract
-from PIL import Image
-from typing import List, Tuple
+import pypdfium2 as pdfium
+from functools import lru_cache
+from itertools import repeat
+from typing import List, Optional, Tuple
 import re
 
+from extractors.common import temporary_pdf
+from utils.pool import map_pages
 
-def extract_text_from_scanned_pdf(pdf_file, dpi: int = 300) -> Tuple[str, dict]:
+
+# Column separator for OCR'd tabular text: 2+ spaces or tabs
+_SPLIT_RE = re.compile(r'\s{2,}|\t+')
+
+
+def _count_pages(pdf_path: str) -> int:
+    """Return the number of pages in the PDF"""
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+@lru_cache(maxsize=None)
+def _get_tess_api(lang: str = 'eng'):
+    """
+    Return this process's Tesseract API for the given language
+    
+    libtesseract is loaded once per worker process and reused for every page
+    that worker handles, instead of spawning a tesseract binary per page.
+    """
+    # Imported here, in the worker: tesserocr installs signal handlers on import,
+    # which fails on a non-main thread such as Streamlit's script thread
+    from tesserocr import PyTessBaseAPI
+    return PyTessBaseAPI(lang=lang)
+
+
+def _ocr_page(pdf_path: str, page_num: int, dpi: int, lang: str) -> Tuple[int, Optional[str], Optional[str]]:
+    """
+    Render and OCR a single page (runs inside a worker process)
+    
+    Rendering happens in the worker so only the file path, not the PDF bytes or
+    page bitmaps, crosses the process boundary; pdfium loads pages lazily from disk.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        page_num: 1-based page number
+        dpi: DPI for rendering
+        lang: Tesseract language code
+        
+    Returns:
+        Tuple of (page number, extracted text or None, error message or None)
+    """
+    try:
+        pdf = pdfium.PdfDocument(pdf_path)
+        try:
+            page = pdf[page_num - 1]
+            # Render straight to 8-bit grayscale: a third of the pixel data of RGB for Tesseract
+            image = page.render(scale=dpi / 72, grayscale=True).to_pil()
+            page.close()
+        finally:
+            pdf.close()
+        
+        api = _get_tess_api(lang)
+        api.SetImage(image)
+        text = api.GetUTF8Text()
+        return page_num, text, None
+    except Exception as e:
+        return page_num, None, str(e)
+
+
+def extract_text_from_scanned_pdf(pdf_bytes: bytes, dpi: int = 200) -> Tuple[str, dict]:
     """
     Extract text from scanned PDF using OCR
     
     Args:
-        pdf_file: Uploaded PDF file object
+        pdf_bytes: Raw PDF bytes
         dpi: DPI for image conversion (higher = better quality but slower)
         
     Returns:
@@ -34,35 +98,36 @@ def extract_text_from_scanned_pdf(pdf_file, dpi: int = 300) -> Tuple[str, dict]:
     all_text = []
     
     try:
-        pdf_file.seek(0)
-        
-        # Convert PDF to images
-        images = convert_from_bytes(pdf_file.read(), dpi=dpi)
-        metadata['pages_processed'] = len(images)
+        # Written to disk once so each worker task only receives the path
+        with temporary_pdf(pdf_bytes) as pdf_path:
+            num_pages = _count_pages(pdf_path)
+            metadata['pages_processed'] = num_pages
+            
+            # Render and OCR pages in parallel - one page per task, results re-ordered by page
+            results = map_pages(
+                _ocr_page,
+                repeat(pdf_path),
+                range(1, num_pages + 1),
+                repeat(dpi),
+                repeat('eng'),
+                num_tasks=num_pages,
+                allow_inline=False
+            )
         
-        # OCR each page
-        for page_num, image in enumerate(images, 1):
-            try:
-                # Perform OCR
-                text = pytesseract.image_to_string(image, lang='eng')
-                
-                if text.strip():
-                    all_text.append(f"--- Page {page_num} ---\n{text}\n")
-                
-            except Exception as e:
-                metadata['errors'].append(f"Page {page_num}: {str(e)}")
+        for page_num, text, error in sorted(results, key=lambda result: result[0]):
+            if error is not None:
+                metadata['errors'].append(f"Page {page_num}: {error}")
+            elif text.strip():
+                all_text.append(f"--- Page {page_num} ---\n{text}\n")
         
         # Combine all text
         full_text = "\n".join(all_text)
         metadata['total_text_length'] = len(full_text)
         
-        pdf_file.seek(0)
-        
         return full_text, metadata
         
     except Exception as e:
         metadata['errors'].append(f"General OCR error: {str(e)}")
-        pdf_file.seek(0)
         return "", metadata
 
 
@@ -90,25 +155,19 @@ def text_to_dataframe(text: str) -> pd.DataFrame:
     
     if word_counts and max(word_counts) > 1 and len(set(word_counts)) <= 3:
         # Looks like tabular data
-        # Try to split by multiple spaces or tabs
-        rows = []
-        for line in lines:
-            # Split by 2+ spaces or tabs
-            parts = re.split(r'\s{2,}|\t+', line)
-            rows.append(parts)
+        # Split by 2+ spaces or tabs
+        rows = [_SPLIT_RE.split(line) for line in lines]
         
         # Find max columns
-        max_cols = max(len(row) for row in rows)
-        
-        # Pad rows to same length
-        padded_rows = [row + [''] * (max_cols - len(row)) for row in rows]
+        max_cols = max(map(len, rows))
         
         # First row as header if it looks like text (not numbers)
-        if padded_rows and not any(part.replace('.', '').replace(',', '').isdigit() 
-                                   for part in padded_rows[0]):
-            df = pd.DataFrame(padded_rows[1:], columns=padded_rows[0])
+        # pd.DataFrame pads short rows itself, only the header needs padding
+        header = rows[0]
+        if not any(part.replace('.', '').replace(',', '').isdigit() for part in header):
+            df = pd.DataFrame(rows[1:], columns=header + [''] * (max_cols - len(header)))
         else:
-            df = pd.DataFrame(padded_rows)
+            df = pd.DataFrame(rows)
             
     else:
         # Not tabular, just return as single column
@@ -117,20 +176,21 @@ def text_to_dataframe(text: str) -> pd.DataFrame:
     return df
 
 
-def extract_scanned_pdf(pdf_file, output_format: str = 'text') -> Tuple[pd.DataFrame, dict]:
+def extract_scanned_pdf(pdf_bytes: bytes, output_format: str = 'text', dpi: int = 200) -> Tuple[pd.DataFrame, dict]:
     """
     Main extraction function for scanned PDFs
     
     Args:
-        pdf_file: Uploaded PDF file object
+        pdf_bytes: Raw PDF bytes
         output_format: 'text' (simple text column) or 'auto' (try to detect structure)
+        dpi: DPI for rendering pages before OCR
         
     Returns:
         Tuple of (DataFrame, metadata dict)
     """
     
     # Extract text using OCR
-    text, metadata = extract_text_from_scanned_pdf(pdf_file)
+    text, metadata = extract_text_from_scanned_pdf(pdf_bytes, dpi=dpi)
     
     # Convert to DataFrame
     if output_format == 'auto':
@@ -145,13 +205,13 @@ def extract_scanned_pdf(pdf_file, output_format: str = 'text') -> Tuple[pd.DataF
     return df, metadata
 
 
-def ocr_with_table_detection(pdf_file, dpi: int = 300) -> Tuple[List[pd.DataFrame], dict]:
+def ocr_with_table_detection(pdf_bytes: bytes, dpi: int = 200) -> Tuple[List[pd.DataFrame], dict]:
     """
     Advanced OCR with table detection
     Attempts to identify and extract tables from scanned PDFs
     
     Args:
-        pdf_file: Uploaded PDF file object
+        pdf_bytes: Raw PDF bytes
         dpi: DPI for image conversion
         
     Returns:
@@ -171,7 +231,7 @@ def ocr_with_table_detection(pdf_file, dpi: int = 300) -> Tuple[List[pd.DataFram
     }
     
     # For now, use the standard OCR
-    df, ocr_metadata = extract_scanned_pdf(pdf_file, output_format='auto')
+    df, ocr_metadata = extract_scanned_pdf(pdf_bytes, output_format='auto', dpi=dpi)
     metadata.update(ocr_metadata)
     
     return [df], metadata
@@ -3,23 +3,55 @@ Text-based PDF with Tables Extractor
 Uses pdfplumber and tabula-py for extracting tables from text-based PDFs
 """
 
-import pdfplumber
 import tabula
 import pandas as pd
-from typing import List, Tuple
-import tempfile
-import os
+from collections import namedtuple
+from itertools import repeat
+from typing import List, Tuple, Union
 
+from extractors.common import count_pages, extract_page, temporary_pdf
+from utils.pool import map_pages
+from utils.converters import concat_dataframes
 
-def extract_with_pdfplumber(pdf_file) -> Tuple[List[pd.DataFrame], dict]:
+
+# A table as extracted by pdfplumber, before any DataFrame is built
+RawTable = namedtuple('RawTable', ['page', 'table_num', 'header', 'rows'])
+
+
+def table_to_dataframe(table: Union[RawTable, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Materialize a RawTable as a DataFrame (DataFrames are returned unchanged)
+    
+    Args:
+        table: RawTable or DataFrame
+        
+    Returns:
+        DataFrame with the source page and table number in attrs
+    """
+    if isinstance(table, pd.DataFrame):
+        return table
+    
+    # First row as header if it looks like headers
+    df = pd.DataFrame(table.rows, columns=table.header)
+    
+    # Add metadata
+    df.attrs['page'] = table.page
+    df.attrs['table_num'] = table.table_num
+    
+    return df
+
+
+def extract_with_pdfplumber(pdf_bytes: bytes, raw: bool = False) -> Tuple[List[Union[RawTable, pd.DataFrame]], dict]:
     """
     Extract tables using pdfplumber
     
     Args:
-        pdf_file: Uploaded PDF file object
+        pdf_bytes: Raw PDF bytes
+        raw: Return RawTable tuples instead of DataFrames, leaving
+             materialization to table_to_dataframe / combine_tables
         
     Returns:
-        Tuple of (list of DataFrames, metadata dict)
+        Tuple of (list of tables, metadata dict)
     """
     tables = []
     metadata = {
@@ -30,35 +62,33 @@ def extract_with_pdfplumber(pdf_file) -> Tuple[List[pd.DataFrame], dict]:
     }
     
     try:
-        pdf_file.seek(0)
-        
-        with pdfplumber.open(pdf_file) as pdf:
-            metadata['pages_processed'] = len(pdf.pages)
+        with temporary_pdf(pdf_bytes) as pdf_path:
+            num_pages = count_pages(pdf_path)
+            metadata['pages_processed'] = num_pages
             
-            for page_num, page in enumerate(pdf.pages, 1):
-                try:
-                    # Extract tables from page
-                    page_tables = page.extract_tables()
-                    
-                    if page_tables:
-                        for table_num, table in enumerate(page_tables, 1):
-                            if table and len(table) > 0:
-                                # Convert to DataFrame
-                                # First row as header if it looks like headers
-                                df = pd.DataFrame(table[1:], columns=table[0])
-                                
-                                # Add metadata
-                                df.attrs['page'] = page_num
-                                df.attrs['table_num'] = table_num
-                                
-                                tables.append(df)
-                                
-                except Exception as e:
-                    metadata['errors'].append(f"Page {page_num}: {str(e)}")
+            # Extract tables from each page in parallel; results come back in page order
+            results = map_pages(
+                extract_page,
+                repeat(pdf_path),
+                range(1, num_pages + 1),
+                repeat(True),
+                repeat(False),
+                num_tasks=num_pages
+            )
+        
+        for page_num, _, page_tables, error in results:
+            if error is not None:
+                metadata['errors'].append(f"Page {page_num}: {error}")
+                continue
             
-            metadata['total_tables'] = len(tables)
+            for table_num, table in enumerate(page_tables, 1):
+                if table and len(table) > 0:
+                    tables.append(RawTable(page_num, table_num, table[0], table[1:]))
         
-        pdf_file.seek(0)
+        metadata['total_tables'] = len(tables)
+        
+        if not raw:
+            tables = [table_to_dataframe(table) for table in tables]
         
     except Exception as e:
         metadata['errors'].append(f"General error: {str(e)}")
@@ -66,12 +96,12 @@ def extract_with_pdfplumber(pdf_file) -> Tuple[List[pd.DataFrame], dict]:
     return tables, metadata
 
 
-def extract_with_tabula(pdf_file) -> Tuple[List[pd.DataFrame], dict]:
+def extract_with_tabula(pdf_bytes: bytes) -> Tuple[List[pd.DataFrame], dict]:
     """
     Extract tables using tabula-py
     
     Args:
-        pdf_file: Uploaded PDF file object
+        pdf_bytes: Raw PDF bytes
         
     Returns:
         Tuple of (list of DataFrames, metadata dict)
@@ -85,14 +115,8 @@ def extract_with_tabula(pdf_file) -> Tuple[List[pd.DataFrame], dict]:
     }
     
     try:
-        pdf_file.seek(0)
-        
         # Tabula needs a file path, so save temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-            tmp_file.write(pdf_file.read())
-            tmp_path = tmp_file.name
-        
-        try:
+        with temporary_pdf(pdf_bytes) as tmp_path:
             # Extract all tables from all pages
             dfs = tabula.read_pdf(
                 tmp_path,
@@ -105,13 +129,6 @@ def extract_with_tabula(pdf_file) -> Tuple[List[pd.DataFrame], dict]:
                 tables = dfs
                 metadata['total_tables'] = len(dfs)
                 metadata['pages_processed'] = 'all'
-                
-        finally:
-            # Clean up temp file
-            if os.path.exists(tmp_path):
-                os.unlink(tmp_path)
-        
-        pdf_file.seek(0)
         
     except Exception as e:
         metadata['errors'].append(f"Tabula error: {str(e)}")
@@ -119,30 +136,32 @@ def extract_with_tabula(pdf_file) -> Tuple[List[pd.DataFrame], dict]:
     return tables, metadata
 
 
-def extract_text_tables(pdf_file, method: str = 'pdfplumber') -> Tuple[List[pd.DataFrame], dict]:
+def extract_text_tables(pdf_bytes: bytes, method: str = 'pdfplumber',
+                        raw: bool = False) -> Tuple[List[Union[RawTable, pd.DataFrame]], dict]:
     """
     Main extraction function for text-based PDFs with tables
     
     Args:
-        pdf_file: Uploaded PDF file object
+        pdf_bytes: Raw PDF bytes
         method: Extraction method ('pdfplumber' or 'tabula')
+        raw: Allow RawTable results (pdfplumber only; tabula always returns DataFrames)
         
     Returns:
-        Tuple of (list of DataFrames, metadata dict)
+        Tuple of (list of tables, metadata dict)
     """
     
     if method == 'tabula':
-        return extract_with_tabula(pdf_file)
+        return extract_with_tabula(pdf_bytes)
     else:
-        return extract_with_pdfplumber(pdf_file)
+        return extract_with_pdfplumber(pdf_bytes, raw=raw)
 
 
-def combine_tables(tables: List[pd.DataFrame], method: str = 'vertical') -> pd.DataFrame:
+def combine_tables(tables: List[Union[RawTable, pd.DataFrame]], method: str = 'vertical') -> pd.DataFrame:
     """
     Combine multiple tables into one DataFrame
     
     Args:
-        tables: List of DataFrames
+        tables: List of RawTables and/or DataFrames
         method: 'vertical' (stack) or 'horizontal' (side by side)
         
     Returns:
@@ -152,16 +171,22 @@ def combine_tables(tables: List[pd.DataFrame], method: str = 'vertical') -> pd.D
         return pd.DataFrame()
     
     if len(tables) == 1:
-        return tables[0]
+        return table_to_dataframe(tables[0])
     
     try:
         if method == 'vertical':
+            # Raw tables sharing a header become one DataFrame directly,
+            # skipping the per-table frames and the concat copy
+            first = tables[0]
+            if all(isinstance(table, RawTable) and table.header == first.header for table in tables):
+                return pd.DataFrame([row for table in tables for row in table.rows], columns=first.header)
+            
             # Stack tables vertically (concatenate rows)
-            return pd.concat(tables, ignore_index=True)
+            return concat_dataframes([table_to_dataframe(table) for table in tables])
         else:
             # Place tables side by side (concatenate columns)
-            return pd.concat(tables, axis=1)
+            return pd.concat([table_to_dataframe(table) for table in tables], axis=1)
     except Exception as e:
         print(f"Error combining tables: {str(e)}")
         # Return first table if combination fails
-        return tables[0]
+        return table_to_dataframe(tables[0])
@@ -0,0 +1,56 @@
+"""
+Persistent Extraction Cache
+Disk-backed cache of extraction results keyed on the PDF contents, so repeat
+uploads of the same file skip extraction even after an app restart
+"""
+
+import hashlib
+import os
+from typing import Callable, Tuple
+
+from diskcache import Cache
+
+
+# Bump whenever extraction output or the pickled result layout (e.g. RawTable)
+# changes, so results cached by older code are never served or unpickled
+CACHE_VERSION = 1
+
+# Per-user cache directory: entries are unpickled on read, so they must not live in
+# a shared location like /tmp where other local users could plant them
+CACHE_DIR = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+    'pdf_extractor'
+)
+
+os.makedirs(CACHE_DIR, mode=0o700, exist_ok=True)
+_cache = Cache(CACHE_DIR, size_limit=2_000_000_000)
+
+
+def cache_key(file_bytes: bytes, *options) -> str:
+    """Build a cache key from the cache version, the SHA256 of the file and the extraction options"""
+    return ':'.join([f'v{CACHE_VERSION}', hashlib.sha256(file_bytes).hexdigest(), *map(str, options)])
+
+
+def cached_extraction(file_bytes: bytes, options: tuple, extract: Callable[[], Tuple]) -> Tuple:
+    """
+    Return a cached extraction result, running and storing it on a miss
+
+    Args:
+        file_bytes: Raw PDF bytes
+        options: Extraction type and options that affect the result
+        extract: Zero-argument callable returning (result, metadata dict)
+
+    Returns:
+        Tuple of (result, metadata dict)
+    """
+    key = cache_key(file_bytes, *options)
+
+    result = _cache.get(key)
+    if result is None:
+        result = extract()
+
+        # Don't persist results that hit errors, so they are retried next time
+        if not result[1].get('errors'):
+            _cache.set(key, result)
+
+    return result
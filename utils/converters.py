@@ -1,24 +1,260 @@
 """
 Data conversion utilities
-Convert extracted data to CSV or Excel formats
+Convert extracted data to CSV, Excel, Parquet or Feather formats
 """
 
-import pandas as pd
-from io import BytesIO
-from typing import Union, List
+from __future__ import annotations
 
+import csv
+import gzip
+import math
+from functools import lru_cache
+from io import BufferedWriter, BytesIO, StringIO
+from typing import TYPE_CHECKING, Iterator, Optional, Union, List
+from openpyxl import Workbook
 
-def dataframe_to_csv(df: pd.DataFrame) -> bytes:
+try:
+    import xlsxwriter
+except ImportError:
+    # Multi-sheet export falls back to openpyxl
+    xlsxwriter = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pacsv
+    import pyarrow.feather as pafeather
+    import pyarrow.parquet as pq
+except ImportError:
+    # pyarrow is optional here - fall back to the pandas implementations
+    pa = None
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# Buffer size for in-memory file output, so the Excel zip writers and the CSV
+# formatter's many small writes are coalesced into large copies
+OUTPUT_BUFFER_SIZE = 1024 * 1024
+
+
+@lru_cache(maxsize=1)
+def _pd():
+    """Import pandas on first use; callers already hold DataFrames, so it's loaded by then"""
+    import pandas
+    return pandas
+
+
+def _has_arrow_columns(df: pd.DataFrame) -> bool:
+    """Whether the column labels survive an Arrow round trip (unique strings)"""
+    return all(isinstance(col, str) for col in df.columns) and df.columns.is_unique
+
+
+def _unique_labels(columns) -> List[str]:
+    """Turn column labels into unique strings, suffixing repeats with _1, _2, ..."""
+    labels = []
+    used = set()
+    for col in columns:
+        label = base = str(col)
+        n = 0
+        while label in used:
+            n += 1
+            label = f'{base}_{n}'
+        used.add(label)
+        labels.append(label)
+    return labels
+
+
+def _to_arrow_table(df: pd.DataFrame) -> pa.Table:
+    """
+    Convert a DataFrame to an Arrow table for columnar export
+    
+    Column labels are made unique strings, and object columns mixing numbers
+    and text are stored as text, since Arrow needs one type per column.
+    
+    Args:
+        df: pandas DataFrame
+        
+    Returns:
+        pyarrow Table
+    """
+    if pa is None:
+        raise ImportError("pyarrow is required for Arrow-based export")
+    
+    if not _has_arrow_columns(df):
+        df = df.set_axis(_unique_labels(df.columns), axis=1)
+    
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+        object_cols = df.select_dtypes(include=['object']).columns
+        df = df.astype({col: 'string' for col in object_cols})
+        return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def concat_dataframes(dataframes: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Stack DataFrames vertically, aligning columns by name
+    
+    Goes through Arrow's concat_tables when possible, which avoids pandas'
+    per-block copy/alignment path; falls back to pd.concat otherwise.
+    
+    Args:
+        dataframes: List of pandas DataFrames
+        
+    Returns:
+        Combined DataFrame
+    """
+    if pa is not None and all(_has_arrow_columns(df) for df in dataframes):
+        try:
+            arrow_tables = [pa.Table.from_pandas(df, preserve_index=False) for df in dataframes]
+            combined = pa.concat_tables(arrow_tables, promote_options='default')
+            return combined.to_pandas(split_blocks=True, self_destruct=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, ValueError, OverflowError):
+            # e.g. the same column holding different types across tables
+            pass
+    
+    return _pd().concat(dataframes, ignore_index=True)
+
+
+def dataframe_to_csv(df: pd.DataFrame, compression: Optional[str] = None) -> bytes:
     """
     Convert pandas DataFrame to CSV bytes
     
     Args:
         df: pandas DataFrame
+        compression: None, 'zstd' or 'gzip' - both use level 1, which is far
+            faster than the usual gzip defaults at a similar ratio for CSV text
         
     Returns:
-        CSV file as bytes
+        CSV file as bytes (compressed if requested)
+    """
+    data = _encode_csv(df)
+    
+    if compression is None:
+        return data
+    if compression == 'gzip':
+        # Fixed mtime so the same data always gives the same bytes (cacheable by hash)
+        return gzip.compress(data, compresslevel=1, mtime=0)
+    if compression == 'zstd':
+        if pa is None:
+            raise ImportError("pyarrow is required for zstd compression")
+        return pa.Codec('zstd', compression_level=1).compress(data, asbytes=True)
+    
+    raise ValueError(f"Unsupported compression: {compression}")
+
+
+def _encode_csv(df: pd.DataFrame) -> bytes:
+    """Serialize a DataFrame to uncompressed UTF-8 CSV bytes"""
+    # Arrow's C++ CSV writer serializes whole columns at once and produces bytes
+    # directly, with no per-row Python loop and no intermediate str to encode.
+    # Every frame goes through _to_arrow_table (mixed columns stored as text) so the
+    # CSV style doesn't depend on the column labels. The labels it makes unique are
+    # only needed by Arrow, so the header row is written from the original labels
+    if pa is not None:
+        try:
+            table = _to_arrow_table(df)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, ValueError, OverflowError):
+            # Not representable in Arrow at all; use pandas below
+            table = None
+        
+        if table is not None:
+            sink = pa.BufferOutputStream()
+            pacsv.write_csv(table, sink, write_options=pacsv.WriteOptions(include_header=False))
+            return _csv_header(df.columns) + sink.getvalue().to_pybytes()
+    
+    # Write encoded bytes straight into the buffer rather than building a full str
+    # and encoding it afterwards, which briefly holds two copies of the file
+    raw = BytesIO()
+    output = BufferedWriter(raw, buffer_size=OUTPUT_BUFFER_SIZE)
+    df.to_csv(output, index=False, encoding='utf-8')
+    output.flush()
+    return raw.getvalue()
+
+
+def _csv_header(columns) -> bytes:
+    """CSV header row for the given column labels, with missing labels left blank like to_csv"""
+    pd = _pd()
+    labels = ['' if pd.api.types.is_scalar(col) and pd.isna(col) else col for col in columns]
+    header = StringIO()
+    csv.writer(header, lineterminator='\n').writerow(labels)
+    return header.getvalue().encode('utf-8')
+
+
+# Above this many cells in total, multi-sheet workbooks are built by rendering the
+# sheets in parallel worker processes (utils.xlsx)
+PARALLEL_EXCEL_MIN_CELLS = 250_000
+
+# xlsxwriter options for multi-sheet export: constant_memory flushes each row as it's
+# written, and cell text is stored as-is instead of being regex-checked per cell
+XLSXWRITER_OPTIONS = {
+    'constant_memory': True,
+    'strings_to_numbers': False,
+    'strings_to_urls': False,
+    'default_date_format': 'yyyy-mm-dd hh:mm:ss',
+    'remove_timezone': True
+}
+
+
+def _excel_rows(df: pd.DataFrame) -> Iterator[tuple]:
+    """Yield a DataFrame's header row followed by its data rows, ready for Excel"""
+    pd = _pd()
+    
+    # Excel writers can't store NaN/NA; write them as empty cells like to_excel does.
+    # That includes missing header cells, which pandas 3 turns into NaN labels
+    yield tuple(None if pd.api.types.is_scalar(col) and pd.isna(col) else col for col in df.columns)
+    values = df.astype(object).where(df.notna(), None)
+    
+    # Nor infinity - write it as text, as to_excel's default inf_rep does
+    is_inf = df.isin([math.inf, -math.inf])
+    if is_inf.to_numpy().any():
+        values = values.mask(is_inf, values.map(str))
+    
+    yield from values.itertuples(index=False, name=None)
+
+
+def _append_sheet(workbook: Workbook, df: pd.DataFrame, sheet_name: str) -> None:
+    """Stream a DataFrame's header and rows into a new sheet of a write-only workbook"""
+    worksheet = workbook.create_sheet(title=sheet_name)
+    for row in _excel_rows(df):
+        worksheet.append(row)
+
+
+class ExcelBundle:
     """
-    return df.to_csv(index=False).encode('utf-8')
+    Build one Excel workbook from any number of DataFrames, one sheet each
+    
+    The workbook is set up once and every add() streams straight into it, so
+    callers producing several sheets don't pay for a new workbook per table.
+    
+    Usage:
+        with ExcelBundle() as bundle:
+            bundle.add(df, 'Sheet1')
+        excel_bytes = bundle.getvalue()
+    """
+    
+    def __init__(self):
+        # A write-only workbook streams rows out instead of building styled Cell objects
+        self._workbook = Workbook(write_only=True)
+        self._raw = BytesIO()
+    
+    def __enter__(self) -> ExcelBundle:
+        return self
+    
+    def add(self, df: pd.DataFrame, sheet_name: str) -> None:
+        """Append a DataFrame as a new sheet"""
+        _append_sheet(self._workbook, df, sheet_name)
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            output = BufferedWriter(self._raw, buffer_size=OUTPUT_BUFFER_SIZE)
+            self._workbook.save(output)
+            # Detach (which flushes) so the BytesIO stays open once output is discarded
+            output.detach()
+    
+    def getvalue(self) -> bytes:
+        """Excel file as bytes (available once the with block has exited)"""
+        return self._raw.getvalue()
 
 
 def dataframe_to_excel(df: pd.DataFrame, sheet_name: str = 'Sheet1') -> bytes:
@@ -32,10 +268,9 @@ def dataframe_to_excel(df: pd.DataFrame, sheet_name: str = 'Sheet1') -> bytes:
     Returns:
         Excel file as bytes
     """
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, sheet_name=sheet_name, index=False)
-    return output.getvalue()
+    with ExcelBundle() as bundle:
+        bundle.add(df, sheet_name)
+    return bundle.getvalue()
 
 
 def multiple_dataframes_to_excel(dataframes: List[pd.DataFrame], 
@@ -53,14 +288,106 @@ def multiple_dataframes_to_excel(dataframes: List[pd.DataFrame],
     if sheet_names is None:
         sheet_names = [f'Sheet{i+1}' for i in range(len(dataframes))]
     
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+    # Big enough to be worth shipping the sheets to the worker pool
+    parallel = len(dataframes) > 1 and sum(df.size for df in dataframes) >= PARALLEL_EXCEL_MIN_CELLS
+    
+    if not parallel and xlsxwriter is None:
+        with ExcelBundle() as bundle:
+            for df, sheet_name in zip(dataframes, sheet_names):
+                bundle.add(df, sheet_name)
+        return bundle.getvalue()
+    
+    raw = BytesIO()
+    output = BufferedWriter(raw, buffer_size=OUTPUT_BUFFER_SIZE)
+    
+    if parallel:
+        from utils.xlsx import write_workbook
+        write_workbook(dataframes, sheet_names, output)
+    else:
+        # Rows must be written in order in constant_memory mode, which is why this
+        # doesn't go through to_excel (it writes column by column)
+        workbook = xlsxwriter.Workbook(output, XLSXWRITER_OPTIONS)
         for df, sheet_name in zip(dataframes, sheet_names):
-            df.to_excel(writer, sheet_name=sheet_name, index=False)
+            worksheet = workbook.add_worksheet(sheet_name)
+            for row_num, row in enumerate(_excel_rows(df)):
+                worksheet.write_row(row_num, 0, row)
+        workbook.close()
+    
+    output.flush()
+    return raw.getvalue()
+
+
+def dataframe_to_parquet(df: pd.DataFrame, compression: str = 'zstd') -> bytes:
+    """
+    Convert pandas DataFrame to Parquet bytes
+    
+    Args:
+        df: pandas DataFrame
+        compression: Parquet compression codec
+        
+    Returns:
+        Parquet file as bytes
+    """
+    output = BytesIO()
+    pq.write_table(_to_arrow_table(df), output, compression=compression)
+    return output.getvalue()
+
+
+def dataframe_to_feather(df: pd.DataFrame, compression: str = 'zstd') -> bytes:
+    """
+    Convert pandas DataFrame to Feather (Arrow IPC file) bytes
     
+    Args:
+        df: pandas DataFrame
+        compression: Feather compression codec
+        
+    Returns:
+        Feather file as bytes
+    """
+    output = BytesIO()
+    pafeather.write_feather(_to_arrow_table(df), output, compression=compression)
     return output.getvalue()
 
 
+def _clean_text_column(series: pd.Series) -> pd.Series:
+    """
+    Strip whitespace and turn 'None' strings into nulls, leaving non-string values alone
+    
+    Pure text columns go through Arrow compute kernels; columns mixing text with
+    numbers etc. only have their actual strings stripped, so nothing is stringified.
+    
+    Args:
+        series: Object or string column
+        
+    Returns:
+        Cleaned column
+    """
+    array = None
+    if pa is not None:
+        try:
+            array = pa.array(series, from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+            # Column mixes text with other types, or holds ints too big for int64
+            pass
+    
+    if array is None:
+        stripped = series.map(lambda value: value.strip() if isinstance(value, str) else value,
+                              na_action='ignore')
+        return stripped.where(stripped != 'None', None)
+    
+    if not (pa.types.is_string(array.type) or pa.types.is_large_string(array.type)):
+        # No text at all (e.g. numbers stored as objects, or all nulls) - nothing to strip
+        return series
+    
+    # utf8_trim_whitespace (not ascii_trim_whitespace or utf8_trim with a character
+    # set) uses the same Unicode whitespace definition as str.strip(), so NBSP
+    # (U+00A0) and other non-ASCII spaces common in PDF text are trimmed too
+    trimmed = pc.utf8_trim_whitespace(array)
+    cleaned = pc.if_else(pc.equal(trimmed, 'None'), pa.scalar(None, trimmed.type), trimmed)
+    pd = _pd()
+    return pd.Series(pd.arrays.ArrowExtensionArray(cleaned), index=series.index, name=series.name)
+
+
 def clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     """
     Basic cleaning operations on extracted data
@@ -71,33 +398,59 @@ def clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         Cleaned DataFrame
     """
-    # Remove completely empty rows and columns
-    df = df.dropna(how='all')
-    df = df.dropna(axis=1, how='all')
+    # Remove completely empty rows and columns, from one null mask and one copy.
+    # (Dropping all-empty rows can't empty a column, so both masks come from the original)
+    not_null = df.notna()
+    df = df.loc[not_null.any(axis=1), not_null.any(axis=0)]
     
-    # Strip whitespace from string columns
-    for col in df.select_dtypes(include=['object']).columns:
-        df[col] = df[col].astype(str).str.strip()
+    # Strip whitespace from string columns and replace 'None' strings with actual nulls.
+    # Text columns are read off df.dtypes directly; select_dtypes builds a filtered
+    # frame just to get their names. (object, plus pandas' str dtype for text columns)
+    is_text = _pd().api.types.is_string_dtype
+    dtypes = df.dtypes
+    text_cols = [col for col, dtype in zip(dtypes.index, dtypes) if is_text(dtype)]
     
-    # Replace 'None' strings with actual None
-    df = df.replace('None', None)
+    for col in text_cols:
+        df[col] = _clean_text_column(df[col])
     
     return df
 
 
-def get_file_extension(format_type: str) -> str:
-    """Get file extension for the given format"""
-    extensions = {
-        'csv': '.csv',
-        'excel': '.xlsx'
-    }
-    return extensions.get(format_type.lower(), '.csv')
+_EXTENSIONS = {
+    'csv': '.csv',
+    'excel': '.xlsx',
+    'parquet': '.parquet',
+    'feather': '.feather'
+}
+
+_COMPRESSED_EXTENSIONS = {
+    'gzip': '.gz',
+    'zstd': '.zst'
+}
+
+_COMPRESSED_MIME_TYPES = {
+    'gzip': 'application/gzip',
+    'zstd': 'application/zstd'
+}
+
+_MIME_TYPES = {
+    'csv': 'text/csv',
+    'excel': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'parquet': 'application/vnd.apache.parquet',
+    'feather': 'application/vnd.apache.arrow.file'
+}
+
+
+def get_file_extension(format_type: str, compression: Optional[str] = None) -> str:
+    """Get file extension for the given format, e.g. '.csv.gz' when compressed"""
+    extension = _EXTENSIONS.get(format_type.casefold(), '.csv')
+    if compression:
+        extension += _COMPRESSED_EXTENSIONS[compression]
+    return extension
 
 
-def get_mime_type(format_type: str) -> str:
-    """Get MIME type for the given format"""
-    mime_types = {
-        'csv': 'text/csv',
-        'excel': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    }
-    return mime_types.get(format_type.lower(), 'text/csv')
+def get_mime_type(format_type: str, compression: Optional[str] = None) -> str:
+    """Get MIME type for the given format (the compression's type when compressed)"""
+    if compression:
+        return _COMPRESSED_MIME_TYPES[compression]
+    return _MIME_TYPES.get(format_type.casefold(), 'text/csv')
@@ -3,8 +3,7 @@ PDF Type Detector
 Automatically detects the type of PDF (text-based, scanned, or mixed report)
 """
 
-import pdfplumber
-import PyPDF2
+from types import MappingProxyType
 from typing import Tuple
 
 
@@ -21,6 +20,8 @@ def detect_pdf_type(pdf_file) -> Tuple[str, dict]:
         metadata: Dict with detection details
     """
     
+    import pdfplumber
+    
     metadata = {
         'total_pages': 0,
         'has_text': False,
@@ -40,28 +41,37 @@ def detect_pdf_type(pdf_file) -> Tuple[str, dict]:
             total_chars = 0
             pages_with_text = 0
             pages_with_tables = 0
+            pages_examined = 0
             
-            # Sample first 3 pages for performance
-            sample_pages = min(3, len(pdf.pages))
+            # Sample first, middle and last pages for performance - cover pages are
+            # often mostly logos, so the first 3 pages can look like a scan
+            num_pages = len(pdf.pages)
+            sample_pages = sorted({0, num_pages // 2, num_pages - 1}) if num_pages else []
             
-            for i in range(sample_pages):
+            for i in sample_pages:
                 page = pdf.pages[i]
+                pages_examined += 1
                 
-                # Check for extractable text
-                text = page.extract_text()
-                if text and len(text.strip()) > 50:  # Minimum text threshold
+                # Check for extractable text - the parsed chars are enough, no need
+                # to lay them out into text
+                num_chars = len(page.chars)
+                if num_chars > 50:  # Minimum text threshold
                     pages_with_text += 1
-                    total_chars += len(text.strip())
+                    total_chars += num_chars
                 
-                # Check for tables
-                tables = page.extract_tables()
-                if tables and len(tables) > 0:
+                # Check for tables - finding them is enough, no need to extract cell text.
+                # A page with no text layer (a scan) can't hold a text table, so skip it
+                if num_chars and page.find_tables():
                     pages_with_tables += 1
+                
+                # Both signals seen; further pages won't change the classification
+                if pages_with_text and pages_with_tables:
+                    break
             
             # Calculate metrics
             metadata['has_text'] = pages_with_text > 0
             metadata['has_tables'] = pages_with_tables > 0
-            metadata['text_percentage'] = (pages_with_text / sample_pages) * 100
+            metadata['text_percentage'] = (pages_with_text / pages_examined) * 100 if pages_examined else 0
             
             # Classify PDF type
             if not metadata['has_text'] or metadata['text_percentage'] < 20:
@@ -97,25 +107,25 @@ def detect_pdf_type(pdf_file) -> Tuple[str, dict]:
         return 'text_tables', metadata
 
 
+# Read-only lookup tables, built once at import
+_DESCRIPTIONS = MappingProxyType({
+    'text_tables': '📊 Text-based PDF with Tables',
+    'scanned': '📷 Scanned/Image-based PDF (requires OCR)',
+    'report': '📄 Text Report/Document'
+})
+
+_METHOD_INFO = MappingProxyType({
+    'text_tables': 'Will use pdfplumber/tabula for high-quality table extraction',
+    'scanned': 'Will use OCR (Tesseract) to extract text from images',
+    'report': 'Will extract all text and any embedded tables using pdfplumber'
+})
+
+
 def get_pdf_type_description(pdf_type: str) -> str:
     """Return user-friendly description of PDF type"""
-    
-    descriptions = {
-        'text_tables': '📊 Text-based PDF with Tables',
-        'scanned': '📷 Scanned/Image-based PDF (requires OCR)',
-        'report': '📄 Text Report/Document'
-    }
-    
-    return descriptions.get(pdf_type, 'Unknown PDF type')
+    return _DESCRIPTIONS.get(pdf_type, 'Unknown PDF type')
 
 
 def get_extraction_method_info(pdf_type: str) -> str:
     """Return information about the extraction method that will be used"""
-    
-    info = {
-        'text_tables': 'Will use pdfplumber/tabula for high-quality table extraction',
-        'scanned': 'Will use OCR (Tesseract) to extract text from images',
-        'report': 'Will extract all text and any embedded tables using pdfplumber'
-    }
-    
-    return info.get(pdf_type, '')
+    return _METHOD_INFO.get(pdf_type, '')
@@ -0,0 +1,71 @@
+"""
+Shared Worker Pool
+Process pool used to run per-page extraction and per-sheet Excel rendering in parallel
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import Callable
+
+
+# Upper bound on pool workers: the pool starts with the server, and CPU quotas
+# (e.g. docker --cpus) don't show up in the CPU count or affinity mask
+MAX_POOL_WORKERS = 8
+
+
+def _available_cpus() -> int:
+    """CPUs this process may run on - in a container os.cpu_count() reports the host's"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+
+@lru_cache(maxsize=1)
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    Shared worker pool, one worker per CPU available to this process (up to MAX_POOL_WORKERS)
+
+    Created on first use and kept for the life of the process, so workers (and
+    per-worker state such as the Tesseract API) are reused across extractions.
+    Workers come from a forkserver (spawned where there is none, e.g. Windows)
+    rather than being forked from the caller: the app runs inside a multi-threaded
+    server, and a forked child can inherit locks held by other threads and deadlock.
+    """
+    max_workers = min(_available_cpus(), MAX_POOL_WORKERS)
+    start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context(start_method))
+
+    # Workers are otherwise only started by the first submits; start them all now
+    # so the first extraction doesn't pay for process start-up
+    for future in [pool.submit(os.getpid) for _ in range(max_workers)]:
+        future.result()
+
+    return pool
+
+
+def map_pages(func: Callable, *iterables, num_tasks: int, allow_inline: bool = True) -> list:
+    """
+    Run func over the given iterables in the shared process pool, preserving order
+
+    Args:
+        func: Top-level (picklable) function to call per page (or sheet)
+        *iterables: Argument iterables, as for map()
+        num_tasks: Number of tasks
+        allow_inline: Run a single task in the calling thread instead of a worker
+
+    Returns:
+        List of results in input order
+    """
+    if num_tasks <= 1 and allow_inline:
+        # Not worth a round trip to the worker processes for a single page
+        return list(map(func, *iterables))
+
+    try:
+        return list(get_process_pool().map(func, *iterables, chunksize=1))
+    except BrokenProcessPool:
+        # A worker died; start a fresh pool next time instead of failing forever
+        get_process_pool.cache_clear()
+        raise
@@ -0,0 +1,220 @@
+"""
+Parallel XLSX Writer
+Builds large multi-sheet workbooks by rendering each sheet's XML in a worker
+process and zipping the parts together in the parent
+"""
+
+import math
+import re
+import zipfile
+from datetime import date, datetime, time
+from numbers import Number
+from typing import BinaryIO, List
+from xml.sax.saxutils import escape, quoteattr
+
+import pandas as pd
+from openpyxl.utils import get_column_letter
+
+from utils.converters import XLSXWRITER_OPTIONS, _excel_rows
+from utils.pool import map_pages
+
+
+# Characters XML 1.0 can't represent at all, even escaped
+_ILLEGAL_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]')
+
+_XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+_MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_DOC_REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_PKG_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+# Characters Excel doesn't allow in sheet names
+_INVALID_SHEET_NAME_CHARS = re.compile(r'[\[\]:*?/\\]')
+
+# Day zero of Excel's 1900 date system, as a datetime (serial 1 is 1900-01-01,
+# counting Excel's phantom 1900-02-29)
+_EXCEL_EPOCH = datetime(1899, 12, 30)
+
+# Cell style 1 formats serial numbers as dates, in the same format the xlsxwriter
+# path uses, so dates look the same whichever writer built the workbook
+_DATE_STYLE = 1
+
+_STYLES_XML = (
+    f'{_XML_DECLARATION}<styleSheet xmlns="{_MAIN_NS}">'
+    f'<numFmts count="1"><numFmt numFmtId="164" formatCode={quoteattr(XLSXWRITER_OPTIONS["default_date_format"])}/></numFmts>'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+_ROOT_RELS = (
+    f'{_XML_DECLARATION}<Relationships xmlns="{_PKG_REL_NS}">'
+    f'<Relationship Id="rId1" Type="{_DOC_REL_NS}/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+
+def _excel_serial(value) -> float:
+    """Convert a date, datetime or time to an Excel serial number (timezones are dropped)"""
+    if isinstance(value, datetime):
+        return (value.replace(tzinfo=None) - _EXCEL_EPOCH).total_seconds() / 86400
+    if isinstance(value, date):
+        return float((value - _EXCEL_EPOCH.date()).days)
+    return (value.hour * 3600 + value.minute * 60 + value.second + value.microsecond / 1e6) / 86400
+
+
+def _cell_xml(ref: str, value) -> str:
+    """
+    Render one cell; numbers and booleans are stored as values, dates and times as
+    date-styled serial numbers (like xlsxwriter/openpyxl), everything else as inline text
+    """
+    if value is None:
+        return ''
+
+    if isinstance(value, (date, time)):
+        return f'<c r="{ref}" s="{_DATE_STYLE}"><v>{_excel_serial(value)!r}</v></c>'
+
+    if isinstance(value, bool):
+        return f'<c r="{ref}" t="b"><v>{int(value)}</v></c>'
+
+    if isinstance(value, Number) and not isinstance(value, complex) and math.isfinite(value):
+        return f'<c r="{ref}"><v>{value}</v></c>'
+
+    text = _ILLEGAL_XML_CHARS.sub('', str(value))
+    space = ' xml:space="preserve"' if text != text.strip() else ''
+    return f'<c r="{ref}" t="inlineStr"><is><t{space}>{escape(text)}</t></is></c>'
+
+
+def worksheet_xml(df: pd.DataFrame) -> bytes:
+    """
+    Render a DataFrame as a complete worksheet part (runs inside a worker process)
+
+    Strings are written inline rather than through a shared strings table, so
+    each sheet can be produced independently of the others.
+
+    Args:
+        df: pandas DataFrame
+
+    Returns:
+        xl/worksheets/sheetN.xml contents as UTF-8 bytes
+    """
+    letters = [get_column_letter(i + 1) for i in range(len(df.columns))]
+    dimension = f'A1:{letters[-1]}{len(df) + 1}' if letters else 'A1'
+
+    parts = [
+        _XML_DECLARATION,
+        f'<worksheet xmlns="{_MAIN_NS}"><dimension ref="{dimension}"/><sheetData>'
+    ]
+    for row_num, row in enumerate(_excel_rows(df), start=1):
+        cells = ''.join(_cell_xml(f'{letter}{row_num}', value) for letter, value in zip(letters, row))
+        parts.append(f'<row r="{row_num}">{cells}</row>')
+    parts.append('</sheetData></worksheet>')
+
+    return ''.join(parts).encode('utf-8')
+
+
+def _check_sheet_names(sheet_names: List[str]) -> List[str]:
+    """
+    Validate sheet names with the same rules xlsxwriter enforces
+
+    Args:
+        sheet_names: Requested sheet names (empty names become Sheet1, Sheet2, ...)
+        
+    Returns:
+        Sheet names to use
+        
+    Raises:
+        ValueError: If a name is too long, has invalid characters or is a duplicate
+    """
+    names = []
+    seen = set()
+    for k, name in enumerate(sheet_names, start=1):
+        name = _ILLEGAL_XML_CHARS.sub('', name or '') or f'Sheet{k}'
+        
+        if len(name) > 31:
+            raise ValueError(f"Excel worksheet name '{name}' must be <= 31 chars.")
+        if _INVALID_SHEET_NAME_CHARS.search(name):
+            raise ValueError(f"Invalid Excel character '[]:*?/\\' in sheetname '{name}'.")
+        if name.startswith("'") or name.endswith("'"):
+            raise ValueError(f'Sheet name cannot start or end with an apostrophe "{name}".')
+        # Excel compares sheet names case-insensitively
+        if name.lower() in seen:
+            raise ValueError(f"Sheetname '{name}', with case ignored, is already in use.")
+        
+        seen.add(name.lower())
+        names.append(name)
+
+    return names
+
+
+def _content_types_xml(num_sheets: int) -> str:
+    sheets = ''.join(
+        f'<Override PartName="/xl/worksheets/sheet{k}.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        for k in range(1, num_sheets + 1)
+    )
+    return (
+        f'{_XML_DECLARATION}<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/styles.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        f'{sheets}</Types>'
+    )
+
+
+def _workbook_xml(sheet_names: List[str]) -> str:
+    sheets = ''.join(
+        f'<sheet name={quoteattr(name)} sheetId="{k}" r:id="rId{k}"/>'
+        for k, name in enumerate(sheet_names, start=1)
+    )
+    return (
+        f'{_XML_DECLARATION}<workbook xmlns="{_MAIN_NS}" xmlns:r="{_DOC_REL_NS}">'
+        f'<sheets>{sheets}</sheets></workbook>'
+    )
+
+
+def _workbook_rels_xml(num_sheets: int) -> str:
+    rels = ''.join(
+        f'<Relationship Id="rId{k}" Type="{_DOC_REL_NS}/worksheet" Target="worksheets/sheet{k}.xml"/>'
+        for k in range(1, num_sheets + 1)
+    )
+    styles = f'<Relationship Id="rId{num_sheets + 1}" Type="{_DOC_REL_NS}/styles" Target="styles.xml"/>'
+    return f'{_XML_DECLARATION}<Relationships xmlns="{_PKG_REL_NS}">{rels}{styles}</Relationships>'
+
+
+def write_workbook(dataframes: List[pd.DataFrame], sheet_names: List[str], output: BinaryIO) -> None:
+    """
+    Write DataFrames as sheets of one .xlsx file, rendering the sheets in parallel
+
+    Args:
+        dataframes: List of pandas DataFrames
+        sheet_names: Sheet name for each DataFrame
+        output: Binary file object to write the workbook to
+        
+    Raises:
+        ValueError: If a sheet name is invalid or duplicated
+    """
+    # Pair frames with names like zip() does, so every listed sheet has a part
+    num_sheets = min(len(dataframes), len(sheet_names))
+    dataframes = dataframes[:num_sheets]
+    
+    # Fail before doing any work, and never write a file Excel would reject
+    sheet_names = _check_sheet_names(sheet_names[:num_sheets])
+
+    sheets = map_pages(worksheet_xml, dataframes, num_tasks=len(dataframes))
+
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', _content_types_xml(num_sheets))
+        archive.writestr('_rels/.rels', _ROOT_RELS)
+        archive.writestr('xl/workbook.xml', _workbook_xml(sheet_names))
+        archive.writestr('xl/_rels/workbook.xml.rels', _workbook_rels_xml(num_sheets))
+        archive.writestr('xl/styles.xml', _STYLES_XML)
+        for k, sheet in enumerate(sheets, start=1):
+            archive.writestr(f'xl/worksheets/sheet{k}.xml', sheet)